@@ -1,13 +1,22 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, stream_with_context
 from flask_cors import CORS
+from flask_compress import Compress
 import os
 import logging
-from werkzeug.utils import secure_filename
+import re
+import threading
+import time
+from functools import lru_cache
+from datetime import datetime, timezone
+from itertools import chain
+from types import MappingProxyType
 from models.text_analyzer import TextAnalyzer
 from models.image_analyzer import ImageAnalyzer
 from models.educational_content import EducationalContent
-import json
+from models.url_features import batch_url_features, url_features
+from models.risk import risk_level
 import base64
+import orjson
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,118 +26,245 @@ app = Flask(__name__)
 CORS(app)
 
 # Configuration
-UPLOAD_FOLDER = 'uploads'
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp'}
+ALLOWED_MIMETYPES = {'image/png', 'image/jpeg', 'image/jpg', 'image/gif', 'image/bmp'}
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+STATIC_ENCODINGS = ['br', 'gzip']  # Preferred order for precompressed payloads
+STATIC_CACHE_CONTROL = 'public, max-age=3600'
+MAX_BATCH_SIZE = 100  # items per batch analysis request
+FAST_ACCEPT_MAX_LENGTH = 60  # URLs at least this long always get full analysis
+
+# A bare http(s) host with at most a trailing '/'; group 1 is the host.
+# Any path is left to full analysis, since trusted hosts also serve
+# user content (e.g. sites.google.com/view/paypal-login-verify)
+_FAST_ACCEPT_RE = re.compile(r'https?://((?:[a-z0-9-]+\.)+[a-z]{2,})/?', re.IGNORECASE)
+HEALTH_CHECK_TTL = 5  # seconds to reuse analyzer health results
 
 app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+app.config['COMPRESS_MIN_SIZE'] = 512
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_STREAMS'] = False  # Keep streamed reports incremental
+
+Compress(app)
+
+# Analyzers are built on first use and shared for the life of the process,
+# so importing this module (e.g. from the reloader's parent) stays cheap
+@lru_cache(maxsize=1)
+def get_text_analyzer():
+    return TextAnalyzer()
+
+@lru_cache(maxsize=1)
+def get_image_analyzer():
+    return ImageAnalyzer()
+
+@lru_cache(maxsize=1)
+def get_education_service():
+    return EducationalContent()
+
+def json_bytes_response(body, status=200):
+    """Wrap already-serialized JSON bytes in a response"""
+    return app.response_class(body, status=status, mimetype='application/json')
+
+def static_json_response(body):
+    """Serve a static JSON payload, using its precompressed variant when accepted
+    
+    Static payloads carry an ETag, so clients revalidating a cached copy get
+    an empty 304 instead of the body.
+    """
+    education = get_education_service()
+    etag = education.get_payload_etag(body)
+    if etag and request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        encoding = request.accept_encodings.best_match(STATIC_ENCODINGS)
+        encoded = education.get_encoded_payload(body, encoding) if encoding else None
+        if encoded is None:
+            response = json_bytes_response(body)
+        else:
+            response = json_bytes_response(encoded)
+            response.headers['Content-Encoding'] = encoding
+    
+    response.vary.add('Accept-Encoding')
+    if etag:
+        # Weak, since the same ETag covers every content encoding of the payload
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = STATIC_CACHE_CONTROL
+    return response
+
+def _orjson_default(obj):
+    """Serialize types orjson does not handle natively"""
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    raise TypeError
+
+def ojsonify(obj, status=200):
+    """Serialize obj with orjson and wrap it in a JSON response"""
+    body = orjson.dumps(obj, default=_orjson_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json_bytes_response(body, status)
+
+def get_request_json():
+    """Parse the request body with orjson (empty body parses as {})"""
+    return orjson.loads(request.get_data() or b'{}')
+
+# Last analyzer health results, reused for HEALTH_CHECK_TTL seconds so
+# frequent liveness probes do not keep re-running the analyzers
+_health_cache = {'checked_at': None, 'result': None}
+_health_cache_lock = threading.Lock()
+
+def check_service_health():
+    """Return (text_healthy, image_healthy), cached for HEALTH_CHECK_TTL seconds"""
+    with _health_cache_lock:
+        checked_at = _health_cache['checked_at']
+        if checked_at is None or time.monotonic() - checked_at > HEALTH_CHECK_TTL:
+            _health_cache['result'] = (
+                get_text_analyzer().is_healthy(),
+                get_image_analyzer().is_healthy()
+            )
+            _health_cache['checked_at'] = time.monotonic()
+        return _health_cache['result']
+
+def _is_clearly_benign_url(url, features):
+    """Cheap structural check for bare URLs of trusted hosts"""
+    length, dashes, _ = features
+    if length >= FAST_ACCEPT_MAX_LENGTH or dashes > 2:
+        return False
+    
+    match = _FAST_ACCEPT_RE.fullmatch(url)
+    if not match:
+        return False
+    
+    host = match.group(1).lower()
+    return any(
+        host == domain or host.endswith('.' + domain)
+        for domain in get_text_analyzer().trusted_domains
+    )
 
-# Initialize analyzers
-text_analyzer = TextAnalyzer()
-image_analyzer = ImageAnalyzer()
-educational_content = EducationalContent()
+def score_url(url, features):
+    """Analyze a URL and apply the structural URL checks"""
+    # Most submitted URLs are benign; skip the full text analysis for the
+    # obvious ones and reserve it for anything suspicious
+    if _is_clearly_benign_url(url, features):
+        return {'risk_level': 'low', 'risk_score': 0, 'confidence': 0.9, 'indicators': []}
+    
+    # URL analysis is part of text analysis
+    result = get_text_analyzer().analyze(url)
+    
+    # Add URL-specific indicators
+    if 'suspicious_url' not in result['indicators']:
+        length, dashes, dots = features
+        if length > 100 or dashes > 5 or dots > 4:
+            result['indicators'].append('suspicious_url_structure')
+            result['risk_score'] += 10
+            result['risk_level'] = risk_level(result['risk_score'])
+    
+    return result
 
-# Create upload directory
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+def _validate_batch(items, field):
+    """Return an error message if items is not a usable batch of strings"""
+    if not isinstance(items, list) or not items:
+        return f'No {field} provided'
+    if len(items) > MAX_BATCH_SIZE:
+        return f'Too many {field}. Maximum is {MAX_BATCH_SIZE}.'
+    if not all(isinstance(item, str) for item in items):
+        return f'All {field} must be strings'
+    return None
 
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+def _summarize(result):
+    """Trim an analysis result to the fields returned by batch endpoints"""
+    return {
+        'risk_level': result['risk_level'],
+        'risk_score': result['risk_score'],
+        'confidence': result['confidence'],
+        'indicators': result['indicators']
+    }
+
+def allowed_file(file):
+    """Gate uploads on their declared MIME type; the filename is never used"""
+    return file.mimetype in ALLOWED_MIMETYPES
 
 @app.route('/api/analyze/text', methods=['POST'])
 def analyze_text():
     """Analyze text content for phishing indicators"""
     try:
-        data = request.get_json()
+        data = get_request_json()
         if not data or 'text' not in data:
-            return jsonify({'error': 'No text provided'}), 400
+            return ojsonify({'error': 'No text provided'}, 400)
         
         text = data['text']
         sender = data.get('sender', '')
         
         # Analyze text content
-        result = text_analyzer.analyze(text)
+        result = get_text_analyzer().analyze(text)
         
         # Analyze sender if provided
         if sender:
-            sender_result = text_analyzer.analyze_sender(sender)
+            sender_result = get_text_analyzer().analyze_sender(sender)
             # Combine results
             combined_risk = max(result['risk_score'], sender_result['risk_score'])
-            combined_indicators = result['indicators'] + sender_result['indicators']
             combined_confidence = (result['confidence'] + sender_result['confidence']) / 2
             
             result = {
-                'risk_level': 'critical' if combined_risk >= 80 else 'high' if combined_risk >= 60 else 'medium' if combined_risk >= 30 else 'low',
+                'risk_level': risk_level(combined_risk),
                 'risk_score': combined_risk,
                 'confidence': combined_confidence,
-                'indicators': list(set(combined_indicators)),
+                'indicators': list(dict.fromkeys(chain(result['indicators'], sender_result['indicators']))),
                 'text_analysis': result,
                 'sender_analysis': sender_result
             }
         
         # Add educational content
-        guidance = educational_content.get_response_guidance(result['risk_level'], result['indicators'])
+        guidance = get_education_service().get_response_guidance(result['risk_level'], result['indicators'])
         result['guidance'] = guidance
         
-        return jsonify(result)
+        return ojsonify(result)
         
     except Exception as e:
         logger.error(f"Text analysis error: {e}")
-        return jsonify({'error': 'Analysis failed'}), 500
+        return ojsonify({'error': 'Analysis failed'}, 500)
 
 @app.route('/api/analyze/image', methods=['POST'])
 def analyze_image():
     """Analyze image/screenshot for phishing indicators"""
     try:
         if 'image' not in request.files and 'image_data' not in request.form:
-            return jsonify({'error': 'No image provided'}), 400
+            return ojsonify({'error': 'No image provided'}, 400)
         
         # Handle file upload
         if 'image' in request.files:
             file = request.files['image']
             if file.filename == '':
-                return jsonify({'error': 'No image selected'}), 400
+                return ojsonify({'error': 'No image selected'}, 400)
             
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
-                
-                result = image_analyzer.analyze(filepath)
-                
-                # Clean up uploaded file
-                try:
-                    os.remove(filepath)
-                except:
-                    pass
+            if file and allowed_file(file):
+                # Analyze the upload in memory rather than round-tripping through disk
+                result = get_image_analyzer().analyze_bytes(file.stream.read())
             else:
-                return jsonify({'error': 'Invalid file type'}), 400
+                return ojsonify({'error': 'Invalid file type'}, 400)
         
         # Handle base64 image data
         elif 'image_data' in request.form:
             image_data = request.form['image_data']
-            result = image_analyzer.analyze(image_data)
+            result = get_image_analyzer().analyze(image_data)
         
         else:
-            return jsonify({'error': 'No valid image data provided'}), 400
+            return ojsonify({'error': 'No valid image data provided'}, 400)
         
         # Add educational content
-        guidance = educational_content.get_response_guidance(result['risk_level'], result['indicators'])
+        guidance = get_education_service().get_response_guidance(result['risk_level'], result['indicators'])
         result['guidance'] = guidance
         
-        return jsonify(result)
+        return ojsonify(result)
         
     except Exception as e:
         logger.error(f"Image analysis error: {e}")
-        return jsonify({'error': 'Image analysis failed'}), 500
+        return ojsonify({'error': 'Image analysis failed'}, 500)
 
 @app.route('/api/analyze/email', methods=['POST'])
 def analyze_email():
     """Analyze email content for phishing indicators"""
     try:
-        data = request.get_json()
+        data = get_request_json()
         if not data:
-            return jsonify({'error': 'No data provided'}), 400
+            return ojsonify({'error': 'No data provided'}, 400)
         
         # Extract email components
         subject = data.get('subject', '')
@@ -138,15 +274,15 @@ def analyze_email():
         
         # Analyze subject and body
         full_text = f"{subject} {body}".strip()
-        text_result = text_analyzer.analyze(full_text)
+        text_result = get_text_analyzer().analyze(full_text)
         
         # Analyze sender
-        sender_result = text_analyzer.analyze_sender(sender) if sender else None
+        sender_result = get_text_analyzer().analyze_sender(sender) if sender else None
         
         # Combine results
         if sender_result:
             combined_risk = max(text_result['risk_score'], sender_result['risk_score'])
-            combined_indicators = text_result['indicators'] + sender_result['indicators']
+            combined_indicators = chain(text_result['indicators'], sender_result['indicators'])
             combined_confidence = (text_result['confidence'] + sender_result['confidence']) / 2
         else:
             combined_risk = text_result['risk_score']
@@ -154,66 +290,92 @@ def analyze_email():
             combined_confidence = text_result['confidence']
         
         result = {
-            'risk_level': 'critical' if combined_risk >= 80 else 'high' if combined_risk >= 60 else 'medium' if combined_risk >= 30 else 'low',
+            'risk_level': risk_level(combined_risk),
             'risk_score': combined_risk,
             'confidence': combined_confidence,
-            'indicators': list(set(combined_indicators)),
+            'indicators': list(dict.fromkeys(combined_indicators)),
             'text_analysis': text_result,
             'sender_analysis': sender_result,
             'attachment_warning': len(attachments) > 0
         }
         
         # Add educational content
-        guidance = educational_content.get_response_guidance(result['risk_level'], result['indicators'])
+        guidance = get_education_service().get_response_guidance(result['risk_level'], result['indicators'])
         result['guidance'] = guidance
         
-        return jsonify(result)
+        return ojsonify(result)
         
     except Exception as e:
         logger.error(f"Email analysis error: {e}")
-        return jsonify({'error': 'Email analysis failed'}), 500
+        return ojsonify({'error': 'Email analysis failed'}, 500)
 
 @app.route('/api/analyze/url', methods=['POST'])
 def analyze_url():
     """Analyze URL for phishing indicators"""
     try:
-        data = request.get_json()
+        data = get_request_json()
         if not data or 'url' not in data:
-            return jsonify({'error': 'No URL provided'}), 400
+            return ojsonify({'error': 'No URL provided'}, 400)
         
         url = data['url']
-        
-        # Analyze URL using text analyzer (URL analysis is part of text analysis)
-        result = text_analyzer.analyze(url)
-        
-        # Add URL-specific indicators
-        if 'suspicious_url' not in result['indicators']:
-            # Additional URL checks
-            if len(url) > 100 or url.count('-') > 5 or url.count('.') > 4:
-                result['indicators'].append('suspicious_url_structure')
-                result['risk_score'] += 10
+        result = score_url(url, url_features(url.encode('utf-8')))
         
         # Add educational content
-        guidance = educational_content.get_response_guidance(result['risk_level'], result['indicators'])
+        guidance = get_education_service().get_response_guidance(result['risk_level'], result['indicators'])
         result['guidance'] = guidance
         
-        return jsonify(result)
+        return ojsonify(result)
         
     except Exception as e:
         logger.error(f"URL analysis error: {e}")
-        return jsonify({'error': 'URL analysis failed'}), 500
+        return ojsonify({'error': 'URL analysis failed'}, 500)
+
+@app.route('/api/analyze/text/batch', methods=['POST'])
+def analyze_text_batch():
+    """Analyze many texts in one request"""
+    try:
+        data = get_request_json()
+        texts = data.get('texts') if isinstance(data, dict) else None
+        error = _validate_batch(texts, 'texts')
+        if error:
+            return ojsonify({'error': error}, 400)
+        
+        # Uncached texts share batched ML inference
+        return ojsonify({'results': [_summarize(result) for result in get_text_analyzer().analyze_many(texts)]})
+        
+    except Exception as e:
+        logger.error(f"Batch text analysis error: {e}")
+        return ojsonify({'error': 'Batch analysis failed'}, 500)
+
+@app.route('/api/analyze/url/batch', methods=['POST'])
+def analyze_url_batch():
+    """Analyze many URLs in one request"""
+    try:
+        data = get_request_json()
+        urls = data.get('urls') if isinstance(data, dict) else None
+        error = _validate_batch(urls, 'urls')
+        if error:
+            return ojsonify({'error': error}, 400)
+        
+        # Structural features for the whole batch come from one kernel call
+        features = batch_url_features([url.encode('utf-8') for url in urls])
+        results = [_summarize(score_url(url, f)) for url, f in zip(urls, features)]
+        return ojsonify({'results': results})
+        
+    except Exception as e:
+        logger.error(f"Batch URL analysis error: {e}")
+        return ojsonify({'error': 'Batch analysis failed'}, 500)
 
 @app.route('/api/education/content', methods=['GET'])
 def get_educational_content():
     """Get educational content"""
     try:
         topic = request.args.get('topic')
-        content = educational_content.get_educational_content(topic)
-        return jsonify(content)
+        return static_json_response(get_education_service().get_educational_content_json(topic))
         
     except Exception as e:
         logger.error(f"Education content error: {e}")
-        return jsonify({'error': 'Failed to retrieve educational content'}), 500
+        return ojsonify({'error': 'Failed to retrieve educational content'}, 500)
 
 @app.route('/api/education/quiz', methods=['GET'])
 def get_quiz():
@@ -221,64 +383,68 @@ def get_quiz():
     try:
         question_id = request.args.get('question_id', type=int)
         if question_id is not None:
-            question = educational_content.get_quiz_question(question_id)
-            return jsonify(question)
+            return static_json_response(get_education_service().get_quiz_question_json(question_id))
         else:
-            questions = educational_content.get_all_quiz_questions()
-            return jsonify(questions)
+            return static_json_response(get_education_service().get_all_quiz_questions_json())
             
     except Exception as e:
         logger.error(f"Quiz error: {e}")
-        return jsonify({'error': 'Failed to retrieve quiz'}), 500
+        return ojsonify({'error': 'Failed to retrieve quiz'}, 500)
 
 @app.route('/api/education/safety-report', methods=['POST'])
 def generate_safety_report():
     """Generate comprehensive safety report"""
     try:
-        data = request.get_json()
+        data = get_request_json()
         if not data or 'analysis_results' not in data:
-            return jsonify({'error': 'No analysis results provided'}), 400
+            return ojsonify({'error': 'No analysis results provided'}, 400)
         
         analysis_results = data['analysis_results']
         user_actions = data.get('user_actions', {})
         
-        report = educational_content.generate_safety_report(analysis_results, user_actions)
+        # JSON-wrapped report kept for clients that still expect it
+        if request.args.get('format') == 'json':
+            report = get_education_service().generate_safety_report(analysis_results, user_actions)
+            return ojsonify({'report': report})
         
-        return jsonify({'report': report})
+        sections = get_education_service().stream_safety_report(analysis_results, user_actions)
+        # Build the first section eagerly so bad input fails before streaming starts
+        first_section = next(sections)
+        return Response(
+            stream_with_context(chain((first_section,), sections)),
+            mimetype='text/plain'
+        )
         
     except Exception as e:
         logger.error(f"Safety report error: {e}")
-        return jsonify({'error': 'Failed to generate safety report'}), 500
+        return ojsonify({'error': 'Failed to generate safety report'}, 500)
 
 @app.route('/api/education/security-checklist', methods=['GET'])
 def get_security_checklist():
     """Get security checklist"""
     try:
-        checklist = educational_content.create_security_checklist()
-        return jsonify({'checklist': checklist})
+        return static_json_response(get_education_service().get_security_checklist_json())
         
     except Exception as e:
         logger.error(f"Security checklist error: {e}")
-        return jsonify({'error': 'Failed to retrieve security checklist'}), 500
+        return ojsonify({'error': 'Failed to retrieve security checklist'}, 500)
 
 @app.route('/api/education/emergency-contacts', methods=['GET'])
 def get_emergency_contacts():
     """Get emergency contact information"""
     try:
-        contacts = educational_content.get_emergency_contacts()
-        return jsonify(contacts)
+        return static_json_response(get_education_service().get_emergency_contacts_json())
         
     except Exception as e:
         logger.error(f"Emergency contacts error: {e}")
-        return jsonify({'error': 'Failed to retrieve emergency contacts'}), 500
+        return ojsonify({'error': 'Failed to retrieve emergency contacts'}, 500)
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     try:
         # Check if all services are healthy
-        text_healthy = text_analyzer.is_healthy()
-        image_healthy = image_analyzer.is_healthy()
+        text_healthy, image_healthy = check_service_health()
         
         health_status = {
             'status': 'healthy' if text_healthy and image_healthy else 'degraded',
@@ -287,31 +453,28 @@ def health_check():
                 'image_analyzer': 'healthy' if image_healthy else 'unhealthy',
                 'educational_content': 'healthy'
             },
-            'timestamp': logging.Formatter().formatTime(logging.LogRecord(
-                name='health', level=logging.INFO, pathname='', lineno=0,
-                msg='', args=(), exc_info=None
-            ))
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds')
         }
         
         status_code = 200 if text_healthy and image_healthy else 503
-        return jsonify(health_status), status_code
+        return ojsonify(health_status, status_code)
         
     except Exception as e:
         logger.error(f"Health check error: {e}")
-        return jsonify({'status': 'unhealthy', 'error': str(e)}), 503
+        return ojsonify({'status': 'unhealthy', 'error': str(e)}, 503)
 
 @app.errorhandler(413)
 def too_large(e):
-    return jsonify({'error': 'File too large. Maximum size is 16MB.'}), 413
+    return ojsonify({'error': 'File too large. Maximum size is 16MB.'}, 413)
 
 @app.errorhandler(404)
 def not_found(e):
-    return jsonify({'error': 'Endpoint not found'}), 404
+    return ojsonify({'error': 'Endpoint not found'}, 404)
 
 @app.errorhandler(500)
 def server_error(e):
-    return jsonify({'error': 'Internal server error'}), 500
+    return ojsonify({'error': 'Internal server error'}, 500)
 
 if __name__ == '__main__':
-    # Development server configuration
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Development server only - use wsgi.py with gunicorn in production
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', host='0.0.0.0', port=5000)
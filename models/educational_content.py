@@ -1,336 +1,442 @@
-import json
-from typing import Dict, List, Optional
+import gzip
+import hashlib
+import re
+import orjson
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Mapping, Optional
 import logging
 
+# Optional brotli support - gzip is always available
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Static sections of the safety report
+_ACTIONS_HEADER = """
+
+📋 RECOMMENDED ACTIONS
+======================
+
+Immediate Actions:
+"""
+
+_LEARNING_HEADER = """
+
+🎓 LEARNING OPPORTUNITY
+========================
+
+Prevention Tips:
+"""
+
+_RESOURCES_FOOTER = """
+
+📚 EDUCATIONAL RESOURCES
+========================
+
+Learn more about phishing protection:
+• Visit cybersecurity awareness websites
+• Take online security training courses
+• Stay updated on latest phishing trends
+• Share knowledge with friends and family
+
+Remember: When in doubt, verify through official channels!
+"""
+
+# Indicators emitted by the text and image analyzers
+KNOWN_INDICATORS = frozenset({
+    'urgency_keywords_found', 'threat_keywords_found', 'financial_keywords_found',
+    'credential_keywords_found', 'suspicious_greetings_found', 'excessive_caps',
+    'excessive_exclamations', 'suspicious_url_in_text', 'mismatched_urls',
+    'bad_url_reputation', 'url_shortened', 'impersonal_greeting', 'poor_grammar',
+    'ml_detected_spam', 'suspicious_tld', 'typosquatting', 'subdomain_spoof',
+    'display_name_spoof', 'suspicious_url_structure', 'login_form_detected',
+    'urgency_language', 'financial_content', 'credential_requests',
+    'suspicious_urls_in_text', 'multiple_form_fields', 'security_icon_detected',
+    'popup_overlay_detected', 'brand_mentions', 'centered_login_form', 'popup_layout',
+    'overlay_pattern', 'fake_browser_chrome', 'phishing_red_flags_detected',
+    'warning_orange_detected', 'danger_yellow_detected', 'high_contrast_warning',
+    'analysis_error', 'basic_analysis_only'
+})
+
+@lru_cache(maxsize=256)
+def _prettify(indicator: str) -> str:
+    """Turn an indicator id into a display label"""
+    return indicator.replace('_', ' ').title()
+
+_PRETTY_INDICATORS = {indicator: _prettify(indicator) for indicator in KNOWN_INDICATORS}
+
+# Indicator keyword -> advice, dispatched with a single regex search per indicator
+_ADVICE_MAP = {
+    'credential': "Never provide passwords or login credentials via email or unknown websites",
+    'urgency': "Legitimate organizations won't pressure you with urgent deadlines",
+    'financial': "Verify financial requests through official banking channels",
+    'suspicious_url': "Always verify URLs by typing them manually in your browser",
+    'typosquatting': "Look for misspelled domain names (e.g., 'gooogle.com' instead of 'google.com')",
+    'subdomain': "Be wary of URLs that put trusted brand names in subdomains",
+    'popup': "Never enter sensitive information in popup windows",
+    'overlay': "Be cautious of websites with overlay elements asking for information",
+}
+_ADVICE_RE = re.compile('|'.join(_ADVICE_MAP))
+_BRAND_SPOOF_ADVICE = "Check for subtle misspellings in brand names and domain names"
+
+def _freeze_guidance(guidance: Dict) -> Mapping:
+    """Make response guidance read-only so it can be shared without copying"""
+    return MappingProxyType({
+        level: MappingProxyType({key: tuple(items) for key, items in sections.items()})
+        for level, sections in guidance.items()
+    })
+
+def _compress_payload(body: bytes) -> Dict[str, bytes]:
+    """Compress a payload with every supported content encoding"""
+    variants = {'gzip': gzip.compress(body)}
+    if BROTLI_AVAILABLE:
+        variants['br'] = brotli.compress(body)
+    return variants
+
 class EducationalContent:
-    def __init__(self):
-        self.response_guidance = {
-            'critical': {
-                'immediate_actions': [
-                    "🚨 DO NOT click any links or download attachments",
-                    "🚨 DO NOT provide any personal information",
-                    "🚨 Disconnect from the internet if you already clicked",
-                    "🚨 Run a full antivirus scan immediately",
-                    "🚨 Change passwords for any accounts you may have accessed"
-                ],
-                'reporting_steps': [
-                    "Report to your IT/security team immediately",
-                    "Forward the email to your organization's security team",
-                    "Report to your email provider (Gmail, Outlook, etc.)",
-                    "Report to government agencies (FTC, FBI IC3)",
-                    "Document everything: screenshots, sender info, URLs"
-                ],
-                'prevention_tips': [
-                    "Never trust urgent requests for personal information",
-                    "Always verify sender identity through official channels",
-                    "Use multi-factor authentication on all accounts",
-                    "Keep software and antivirus updated",
-                    "Regularly backup important data"
-                ]
-            },
-            'high': {
-                'immediate_actions': [
-                    "⚠️ Do not interact with the suspicious content",
-                    "⚠️ Do not provide personal information",
-                    "⚠️ Verify the sender through official channels",
-                    "⚠️ Check the legitimacy of any mentioned websites"
-                ],
-                'reporting_steps': [
-                    "Report to your email provider",
-                    "Inform your IT department",
-                    "Report to anti-phishing organizations",
-                    "Block the sender"
-                ],
-                'prevention_tips': [
-                    "Always hover over links to see actual URLs",
-                    "Check for spelling errors and poor grammar",
-                    "Verify requests through official websites",
-                    "Use strong, unique passwords"
-                ]
-            },
-            'medium': {
-                'immediate_actions': [
-                    "🔍 Be cautious and verify the content",
-                    "🔍 Check sender details carefully",
-                    "🔍 Look for suspicious elements in the message"
-                ],
-                'reporting_steps': [
-                    "Mark as spam in your email client",
-                    "Report to your email provider if appropriate"
-                ],
-                'prevention_tips': [
-                    "Stay vigilant about unexpected messages",
-                    "Keep your security software updated",
-                    "Learn to recognize common phishing patterns"
-                ]
-            },
-            'low': {
-                'immediate_actions': [
-                    "✅ Content appears safe but stay alert",
-                    "✅ Continue normal security practices"
-                ],
-                'reporting_steps': [
-                    "No specific reporting needed"
-                ],
-                'prevention_tips': [
-                    "Maintain good security habits",
-                    "Keep learning about new phishing techniques",
-                    "Share knowledge with others"
-                ]
-            }
+    RESPONSE_GUIDANCE = _freeze_guidance({
+        'critical': {
+            'immediate_actions': [
+                "🚨 DO NOT click any links or download attachments",
+                "🚨 DO NOT provide any personal information",
+                "🚨 Disconnect from the internet if you already clicked",
+                "🚨 Run a full antivirus scan immediately",
+                "🚨 Change passwords for any accounts you may have accessed"
+            ],
+            'reporting_steps': [
+                "Report to your IT/security team immediately",
+                "Forward the email to your organization's security team",
+                "Report to your email provider (Gmail, Outlook, etc.)",
+                "Report to government agencies (FTC, FBI IC3)",
+                "Document everything: screenshots, sender info, URLs"
+            ],
+            'prevention_tips': [
+                "Never trust urgent requests for personal information",
+                "Always verify sender identity through official channels",
+                "Use multi-factor authentication on all accounts",
+                "Keep software and antivirus updated",
+                "Regularly backup important data"
+            ]
+        },
+        'high': {
+            'immediate_actions': [
+                "⚠️ Do not interact with the suspicious content",
+                "⚠️ Do not provide personal information",
+                "⚠️ Verify the sender through official channels",
+                "⚠️ Check the legitimacy of any mentioned websites"
+            ],
+            'reporting_steps': [
+                "Report to your email provider",
+                "Inform your IT department",
+                "Report to anti-phishing organizations",
+                "Block the sender"
+            ],
+            'prevention_tips': [
+                "Always hover over links to see actual URLs",
+                "Check for spelling errors and poor grammar",
+                "Verify requests through official websites",
+                "Use strong, unique passwords"
+            ]
+        },
+        'medium': {
+            'immediate_actions': [
+                "🔍 Be cautious and verify the content",
+                "🔍 Check sender details carefully",
+                "🔍 Look for suspicious elements in the message"
+            ],
+            'reporting_steps': [
+                "Mark as spam in your email client",
+                "Report to your email provider if appropriate"
+            ],
+            'prevention_tips': [
+                "Stay vigilant about unexpected messages",
+                "Keep your security software updated",
+                "Learn to recognize common phishing patterns"
+            ]
+        },
+        'low': {
+            'immediate_actions': [
+                "✅ Content appears safe but stay alert",
+                "✅ Continue normal security practices"
+            ],
+            'reporting_steps': [
+                "No specific reporting needed"
+            ],
+            'prevention_tips': [
+                "Maintain good security habits",
+                "Keep learning about new phishing techniques",
+                "Share knowledge with others"
+            ]
         }
-        
-        self.educational_resources = {
-            'phishing_basics': {
-                'title': 'Understanding Phishing Attacks',
-                'content': [
-                    "Phishing is a cybercrime where attackers impersonate legitimate organizations to steal sensitive data.",
-                    "Common targets include passwords, credit card numbers, and personal information.",
-                    "Phishing can occur through email, text messages, phone calls, and fake websites.",
-                    "Attackers often create a sense of urgency to pressure victims into acting quickly."
-                ],
-                'examples': [
-                    "Fake emails from your bank asking to verify account details",
-                    "Messages claiming your account will be suspended",
-                    "Fake login pages that look identical to real websites",
-                    "Urgent requests for wire transfers or gift card purchases"
-                ]
-            },
-            'recognition_tips': {
-                'title': 'How to Spot Phishing Attempts',
-                'content': [
-                    "Check the sender's email address carefully - look for misspellings or unusual domains.",
-                    "Hover over links to see the actual destination URL before clicking.",
-                    "Look for poor grammar, spelling errors, and unprofessional formatting.",
-                    "Be suspicious of urgent requests for personal or financial information.",
-                    "Check if the greeting is generic (\"Dear Customer\") instead of personalized."
-                ],
-                'red_flags': [
-                    "Requests for passwords or sensitive information",
-                    "Threats of account closure or legal action",
-                    "Offers that seem too good to be true",
-                    "Unexpected attachments or downloads",
-                    "URLs that don't match the claimed organization"
-                ]
-            },
-            'safe_practices': {
-                'title': 'Safe Online Practices',
-                'content': [
-                    "Use unique, strong passwords for each account.",
-                    "Enable two-factor authentication whenever possible.",
-                    "Keep your operating system and software updated.",
-                    "Use reputable antivirus and anti-malware software.",
-                    "Regularly backup important data to secure locations."
-                ],
-                'best_practices': [
-                    "Verify requests through official channels (call the company directly)",
-                    "Use password managers to generate and store strong passwords",
-                    "Be cautious with public Wi-Fi - use VPN when possible",
-                    "Check website security (HTTPS, valid certificates)",
-                    "Educate yourself about current phishing trends"
-                ]
-            }
+    })
+    
+    EDUCATIONAL_RESOURCES = MappingProxyType({
+        'phishing_basics': {
+            'title': 'Understanding Phishing Attacks',
+            'content': [
+                "Phishing is a cybercrime where attackers impersonate legitimate organizations to steal sensitive data.",
+                "Common targets include passwords, credit card numbers, and personal information.",
+                "Phishing can occur through email, text messages, phone calls, and fake websites.",
+                "Attackers often create a sense of urgency to pressure victims into acting quickly."
+            ],
+            'examples': [
+                "Fake emails from your bank asking to verify account details",
+                "Messages claiming your account will be suspended",
+                "Fake login pages that look identical to real websites",
+                "Urgent requests for wire transfers or gift card purchases"
+            ]
+        },
+        'recognition_tips': {
+            'title': 'How to Spot Phishing Attempts',
+            'content': [
+                "Check the sender's email address carefully - look for misspellings or unusual domains.",
+                "Hover over links to see the actual destination URL before clicking.",
+                "Look for poor grammar, spelling errors, and unprofessional formatting.",
+                "Be suspicious of urgent requests for personal or financial information.",
+                "Check if the greeting is generic (\"Dear Customer\") instead of personalized."
+            ],
+            'red_flags': [
+                "Requests for passwords or sensitive information",
+                "Threats of account closure or legal action",
+                "Offers that seem too good to be true",
+                "Unexpected attachments or downloads",
+                "URLs that don't match the claimed organization"
+            ]
+        },
+        'safe_practices': {
+            'title': 'Safe Online Practices',
+            'content': [
+                "Use unique, strong passwords for each account.",
+                "Enable two-factor authentication whenever possible.",
+                "Keep your operating system and software updated.",
+                "Use reputable antivirus and anti-malware software.",
+                "Regularly backup important data to secure locations."
+            ],
+            'best_practices': [
+                "Verify requests through official channels (call the company directly)",
+                "Use password managers to generate and store strong passwords",
+                "Be cautious with public Wi-Fi - use VPN when possible",
+                "Check website security (HTTPS, valid certificates)",
+                "Educate yourself about current phishing trends"
+            ]
         }
-        
-        self.quiz_questions = [
-            {
-                'question': 'What should you do if you receive an urgent email from your bank asking for account verification?',
-                'options': [
-                    'Click the link and provide the information immediately',
-                    'Call your bank using the number on their official website',
-                    'Forward the email to your friends to warn them',
-                    'Delete the email without taking any action'
-                ],
-                'correct_answer': 1,
-                'explanation': 'Always verify urgent requests by contacting the organization through official channels, not through links or numbers provided in suspicious emails.'
-            },
-            {
-                'question': 'Which of these is a common phishing red flag?',
-                'options': [
-                    'Personalized greeting with your name',
-                    'Professional formatting and perfect grammar',
-                    'Generic greeting like \"Dear Customer\"',
-                    'Contact information that matches the official website'
-                ],
-                'correct_answer': 2,
-                'explanation': 'Generic greetings are common in phishing emails because attackers send them to many people and don\'t have personalized information.'
-            },
-            {
-                'question': 'What is the best way to check if a link is safe?',
-                'options': [
-                    'Click on it to see where it goes',
-                    'Hover over it to see the actual URL',
-                    'Copy and paste it into your browser',
-                    'Ask a friend to click it first'
-                ],
-                'correct_answer': 1,
-                'explanation': 'Hovering over links reveals the actual destination URL, allowing you to check if it matches the claimed destination.'
-            }
-        ]
+    })
+    
+    QUIZ_QUESTIONS = (
+        {
+            'question': 'What should you do if you receive an urgent email from your bank asking for account verification?',
+            'options': [
+                'Click the link and provide the information immediately',
+                'Call your bank using the number on their official website',
+                'Forward the email to your friends to warn them',
+                'Delete the email without taking any action'
+            ],
+            'correct_answer': 1,
+            'explanation': 'Always verify urgent requests by contacting the organization through official channels, not through links or numbers provided in suspicious emails.'
+        },
+        {
+            'question': 'Which of these is a common phishing red flag?',
+            'options': [
+                'Personalized greeting with your name',
+                'Professional formatting and perfect grammar',
+                'Generic greeting like \"Dear Customer\"',
+                'Contact information that matches the official website'
+            ],
+            'correct_answer': 2,
+            'explanation': 'Generic greetings are common in phishing emails because attackers send them to many people and don\'t have personalized information.'
+        },
+        {
+            'question': 'What is the best way to check if a link is safe?',
+            'options': [
+                'Click on it to see where it goes',
+                'Hover over it to see the actual URL',
+                'Copy and paste it into your browser',
+                'Ask a friend to click it first'
+            ],
+            'correct_answer': 1,
+            'explanation': 'Hovering over links reveals the actual destination URL, allowing you to check if it matches the claimed destination.'
+        }
+    )
+    
+    SECURITY_CHECKLIST = (
+        "□ Verify sender email addresses carefully",
+        "□ Hover over links before clicking to see actual destinations",
+        "□ Look for HTTPS and valid SSL certificates on websites",
+        "□ Check for spelling and grammar errors",
+        "□ Be suspicious of urgent requests for personal information",
+        "□ Use unique, strong passwords for each account",
+        "□ Enable two-factor authentication where available",
+        "□ Keep software and antivirus programs updated",
+        "□ Regularly backup important data",
+        "□ Report suspicious emails to your IT department",
+        "□ Educate yourself about current phishing trends",
+        "□ Share security knowledge with friends and family"
+    )
+    
+    EMERGENCY_CONTACTS = MappingProxyType({
+        'FTC_Report_Fraud': 'https://reportfraud.ftc.gov/',
+        'FBI_IC3': 'https://www.ic3.gov/',
+        'Anti_Phishing_Working_Group': 'reportphishing@apwg.org',
+        'US_Cert': 'https://www.us-cert.gov/report-phishing',
+        'Microsoft_Security': 'https://www.microsoft.com/en-us/wdsi/support/report-unsafe-site-guest',
+        'Google_Safe_Browsing': 'https://safebrowsing.google.com/safebrowsing/report_phish/'
+    })
+    
+    # Static payloads never change, so serialize them once per process
+    _ALL_EDU_JSON = orjson.dumps(dict(EDUCATIONAL_RESOURCES))
+    _EDU_TOPIC_JSON = {
+        topic: orjson.dumps(content)
+        for topic, content in EDUCATIONAL_RESOURCES.items()
+    }
+    _ALL_QUIZ_JSON = orjson.dumps(QUIZ_QUESTIONS)
+    _QUIZ_QUESTION_JSON = tuple(orjson.dumps(q) for q in QUIZ_QUESTIONS)
+    _CHECKLIST_JSON = orjson.dumps({'checklist': SECURITY_CHECKLIST})
+    _CONTACTS_JSON = orjson.dumps(dict(EMERGENCY_CONTACTS))
+    
+    _STATIC_PAYLOADS = (
+        _ALL_EDU_JSON, _ALL_QUIZ_JSON, _CHECKLIST_JSON, _CONTACTS_JSON,
+        *_EDU_TOPIC_JSON.values(), *_QUIZ_QUESTION_JSON
+    )
+    
+    # Compress and fingerprint each static payload once, keyed by its serialized bytes
+    _ENCODED_PAYLOADS = {body: _compress_payload(body) for body in _STATIC_PAYLOADS}
+    _PAYLOAD_ETAGS = {body: hashlib.sha1(body).hexdigest() for body in _STATIC_PAYLOADS}
 
-    def get_response_guidance(self, risk_level: str, indicators: List[str] = None) -> Dict:
-        """Get appropriate response guidance based on risk level"""
-        if risk_level not in self.response_guidance:
-            risk_level = 'medium'
+    def get_response_guidance(self, risk_level: str, indicators: List[str] = None) -> Mapping:
+        """Get appropriate response guidance based on risk level
         
-        guidance = self.response_guidance[risk_level].copy()
+        The base guidance is a shared read-only mapping; a new dict is only
+        built when indicator-specific advice has to be added.
+        """
+        base = self.RESPONSE_GUIDANCE.get(risk_level, self.RESPONSE_GUIDANCE['medium'])
+        if not indicators:
+            return base
         
         # Add specific advice based on indicators
-        if indicators:
-            specific_advice = self._get_indicator_specific_advice(indicators)
-            if specific_advice:
-                guidance['specific_advice'] = specific_advice
-        
-        return guidance
+        specific_advice = self._get_indicator_specific_advice(indicators)
+        return {**base, 'specific_advice': specific_advice} if specific_advice else base
     
     def get_educational_content(self, topic: str = None) -> Dict:
         """Get educational content for users"""
-        if topic and topic in self.educational_resources:
-            return self.educational_resources[topic]
+        if topic and topic in self.EDUCATIONAL_RESOURCES:
+            return self.EDUCATIONAL_RESOURCES[topic]
         
         # Return all educational content if no specific topic
-        return self.educational_resources
+        return self.EDUCATIONAL_RESOURCES
     
     def get_quiz_question(self, question_id: int = None) -> Dict:
         """Get a quiz question for user education"""
-        if question_id is not None and 0 <= question_id < len(self.quiz_questions):
-            return self.quiz_questions[question_id]
+        if question_id is not None and 0 <= question_id < len(self.QUIZ_QUESTIONS):
+            return self.QUIZ_QUESTIONS[question_id]
         
         # Return first question by default
-        return self.quiz_questions[0] if self.quiz_questions else {}
+        return self.QUIZ_QUESTIONS[0] if self.QUIZ_QUESTIONS else {}
     
     def get_all_quiz_questions(self) -> List[Dict]:
         """Get all available quiz questions"""
-        return self.quiz_questions
+        return list(self.QUIZ_QUESTIONS)
+    
+    def get_educational_content_json(self, topic: str = None) -> bytes:
+        """Get pre-serialized educational content"""
+        return self._EDU_TOPIC_JSON.get(topic, self._ALL_EDU_JSON)
+    
+    def get_quiz_question_json(self, question_id: int = None) -> bytes:
+        """Get a pre-serialized quiz question"""
+        if question_id is not None and 0 <= question_id < len(self._QUIZ_QUESTION_JSON):
+            return self._QUIZ_QUESTION_JSON[question_id]
+        
+        return self._QUIZ_QUESTION_JSON[0] if self._QUIZ_QUESTION_JSON else b'{}'
+    
+    def get_all_quiz_questions_json(self) -> bytes:
+        """Get all quiz questions pre-serialized"""
+        return self._ALL_QUIZ_JSON
+    
+    def get_security_checklist_json(self) -> bytes:
+        """Get the pre-serialized security checklist payload"""
+        return self._CHECKLIST_JSON
+    
+    def get_emergency_contacts_json(self) -> bytes:
+        """Get pre-serialized emergency contact information"""
+        return self._CONTACTS_JSON
+    
+    def get_encoded_payload(self, body: bytes, encoding: str) -> Optional[bytes]:
+        """Get a precompressed variant of a static payload, if one exists"""
+        variants = self._ENCODED_PAYLOADS.get(body)
+        return variants.get(encoding) if variants else None
+    
+    def get_payload_etag(self, body: bytes) -> Optional[str]:
+        """Get the ETag of a static payload, if it is one"""
+        return self._PAYLOAD_ETAGS.get(body)
     
     def generate_safety_report(self, analysis_results: Dict, user_actions: Dict = None) -> str:
         """Generate a comprehensive safety report"""
+        return "".join(self.stream_safety_report(analysis_results, user_actions))
+    
+    def stream_safety_report(self, analysis_results: Dict, user_actions: Dict = None) -> Iterator[str]:
+        """Generate the safety report section by section"""
         risk_level = analysis_results.get('risk_level', 'unknown')
         risk_score = analysis_results.get('risk_score', 0)
         indicators = analysis_results.get('indicators', [])
         
-        report = f"""
-🛡️ ANTI-PHISHING SAFETY REPORT
-=====================================
-
-Risk Assessment: {risk_level.upper()}
-Risk Score: {risk_score}/100
-Confidence: {analysis_results.get('confidence', 0):.1%}
-
-Detected Indicators:
-"""
-        
-        for indicator in indicators:
-            report += f"• {indicator.replace('_', ' ').title()}\n"
+        yield (
+            "\n🛡️ ANTI-PHISHING SAFETY REPORT\n"
+            "=====================================\n\n"
+            f"Risk Assessment: {risk_level.upper()}\n"
+            f"Risk Score: {risk_score}/100\n"
+            f"Confidence: {analysis_results.get('confidence', 0):.1%}\n\n"
+            "Detected Indicators:\n"
+        ) + "".join(
+            f"• {_PRETTY_INDICATORS.get(indicator) or _prettify(indicator)}\n"
+            for indicator in indicators
+        )
         
         # Add response guidance
         guidance = self.get_response_guidance(risk_level, indicators)
         
-        report += f"""
-
-📋 RECOMMENDED ACTIONS
-======================
-
-Immediate Actions:
-"""
-        for action in guidance.get('immediate_actions', []):
-            report += f"{action}\n"
+        yield _ACTIONS_HEADER + "".join(
+            f"{action}\n" for action in guidance.get('immediate_actions', ())
+        )
         
         if 'reporting_steps' in guidance:
-            report += f"""
-
-Reporting Steps:
-"""
-            for step in guidance['reporting_steps']:
-                report += f"• {step}\n"
+            yield "\n\nReporting Steps:\n" + "".join(
+                f"• {step}\n" for step in guidance['reporting_steps']
+            )
         
         if 'specific_advice' in guidance:
-            report += f"""
-
-Specific Advice:
-"""
-            for advice in guidance['specific_advice']:
-                report += f"• {advice}\n"
+            yield "\n\nSpecific Advice:\n" + "".join(
+                f"• {advice}\n" for advice in guidance['specific_advice']
+            )
         
-        report += f"""
-
-🎓 LEARNING OPPORTUNITY
-========================
-
-Prevention Tips:
-"""
-        for tip in guidance.get('prevention_tips', []):
-            report += f"• {tip}\n"
+        yield _LEARNING_HEADER + "".join(
+            f"• {tip}\n" for tip in guidance.get('prevention_tips', ())
+        )
         
         # Add educational content
-        report += f"""
-
-📚 EDUCATIONAL RESOURCES
-========================
-
-Learn more about phishing protection:
-• Visit cybersecurity awareness websites
-• Take online security training courses
-• Stay updated on latest phishing trends
-• Share knowledge with friends and family
-
-Remember: When in doubt, verify through official channels!
-"""
-        
-        return report
+        yield _RESOURCES_FOOTER
     
     def _get_indicator_specific_advice(self, indicators: List[str]) -> List[str]:
         """Get specific advice based on detected indicators"""
         specific_advice = []
         
         for indicator in indicators:
-            if 'credential' in indicator:
-                specific_advice.append("Never provide passwords or login credentials via email or unknown websites")
-            elif 'urgency' in indicator:
-                specific_advice.append("Legitimate organizations won't pressure you with urgent deadlines")
-            elif 'financial' in indicator:
-                specific_advice.append("Verify financial requests through official banking channels")
-            elif 'suspicious_url' in indicator:
-                specific_advice.append("Always verify URLs by typing them manually in your browser")
+            match = _ADVICE_RE.search(indicator)
+            if match:
+                specific_advice.append(_ADVICE_MAP[match.group()])
             elif 'brand' in indicator and 'spoof' in indicator:
-                specific_advice.append("Check for subtle misspellings in brand names and domain names")
-            elif 'typosquatting' in indicator:
-                specific_advice.append("Look for misspelled domain names (e.g., 'gooogle.com' instead of 'google.com')")
-            elif 'subdomain' in indicator:
-                specific_advice.append("Be wary of URLs that put trusted brand names in subdomains")
-            elif 'popup' in indicator:
-                specific_advice.append("Never enter sensitive information in popup windows")
-            elif 'overlay' in indicator:
-                specific_advice.append("Be cautious of websites with overlay elements asking for information")
+                specific_advice.append(_BRAND_SPOOF_ADVICE)
         
-        return specific_advice
+        # Drop repeated advice while keeping first-seen order
+        return list(dict.fromkeys(specific_advice))
     
     def create_security_checklist(self) -> List[str]:
         """Create a security checklist for users"""
-        return [
-            "□ Verify sender email addresses carefully",
-            "□ Hover over links before clicking to see actual destinations",
-            "□ Look for HTTPS and valid SSL certificates on websites",
-            "□ Check for spelling and grammar errors",
-            "□ Be suspicious of urgent requests for personal information",
-            "□ Use unique, strong passwords for each account",
-            "□ Enable two-factor authentication where available",
-            "□ Keep software and antivirus programs updated",
-            "□ Regularly backup important data",
-            "□ Report suspicious emails to your IT department",
-            "□ Educate yourself about current phishing trends",
-            "□ Share security knowledge with friends and family"
-        ]
+        return list(self.SECURITY_CHECKLIST)
     
     def get_emergency_contacts(self) -> Dict[str, str]:
         """Get emergency contact information for reporting phishing"""
-        return {
-            'FTC_Report_Fraud': 'https://reportfraud.ftc.gov/',
-            'FBI_IC3': 'https://www.ic3.gov/',
-            'Anti_Phishing_Working_Group': 'reportphishing@apwg.org',
-            'US_Cert': 'https://www.us-cert.gov/report-phishing',
-            'Microsoft_Security': 'https://www.microsoft.com/en-us/wdsi/support/report-unsafe-site-guest',
-            'Google_Safe_Browsing': 'https://safebrowsing.google.com/safebrowsing/report_phish/'
-        }
\ No newline at end of file
+        return dict(self.EMERGENCY_CONTACTS)
@@ -0,0 +1,24 @@
+import logging
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+def warm_up_kernels(name: str, fallback: str, *calls: Callable[[], object]) -> bool:
+    """
+    Run numba kernels once so they are compiled at import, not on the first request
+
+    Args:
+        name: Kernel description used in the warning, e.g. "URL feature"
+        fallback: What the caller uses instead when warm-up fails
+        calls: Zero-argument callables that each exercise a kernel
+
+    Returns:
+        False if any kernel could not be compiled or loaded
+    """
+    try:
+        for call in calls:
+            call()
+    except Exception as e:
+        logger.warning(f"{name} kernel warm-up failed, using {fallback}: {e}")
+        return False
+    return True
@@ -0,0 +1,76 @@
+import logging
+import re
+from typing import Dict, Iterable, Set
+
+# Optional Aho-Corasick automaton - falls back to one regex alternation per category
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+class KeywordMatcher:
+    """Find which keywords of each category occur in a text"""
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        self.categories = {category: tuple(keywords) for category, keywords in categories.items()}
+
+        # One automaton over every keyword finds all categories in a single pass
+        self._automaton = None
+        if AHOCORASICK_AVAILABLE:
+            automaton = ahocorasick.Automaton()
+            for category, keywords in self.categories.items():
+                for keyword in keywords:
+                    # The same keyword may belong to several categories
+                    matches = automaton.get(keyword, ())
+                    automaton.add_word(keyword, matches + ((category, keyword),))
+            automaton.make_automaton()
+            self._automaton = automaton
+        else:
+            # A lookahead reports a match at every position, so overlapping
+            # keywords are all found; longest first so the longer of two
+            # keywords sharing a start wins
+            self._patterns = {
+                category: re.compile('(?=(' + '|'.join(
+                    map(re.escape, sorted(set(keywords), key=len, reverse=True))
+                ) + '))')
+                for category, keywords in self.categories.items()
+                if keywords
+            }
+            # Keywords that are prefixes of a matched keyword occur there too
+            self._prefixes = {
+                category: {
+                    keyword: frozenset(other for other in keywords if keyword.startswith(other))
+                    for keyword in keywords
+                }
+                for category, keywords in self.categories.items()
+            }
+
+    def find(self, text: str) -> Dict[str, Set[str]]:
+        """
+        Find the keywords present in text
+
+        Args:
+            text: Text to scan (keywords are matched as substrings)
+
+        Returns:
+            Dict mapping each category with at least one hit to the set of
+            its keywords found in text
+        """
+        found = {}
+
+        if self._automaton is not None:
+            for _, matches in self._automaton.iter(text):
+                for category, keyword in matches:
+                    found.setdefault(category, set()).add(keyword)
+            return found
+
+        for category, pattern in self._patterns.items():
+            matches = set(pattern.findall(text))
+            if matches:
+                prefixes = self._prefixes[category]
+                found[category] = set().union(*(prefixes[keyword] for keyword in matches))
+
+        return found
@@ -0,0 +1,9 @@
+from bisect import bisect_right
+
+# Risk score cutoffs and the level each band maps to
+RISK_THRESHOLDS = (30, 60, 80)
+RISK_LEVELS = ('low', 'medium', 'high', 'critical')
+
+def risk_level(score: float) -> str:
+    """Map a risk score onto its risk level"""
+    return RISK_LEVELS[bisect_right(RISK_THRESHOLDS, score)]
@@ -0,0 +1,84 @@
+from typing import List, Tuple
+
+from models.jit import warm_up_kernels
+
+# Optional JIT compilation - falls back to C-level bytes methods without it
+try:
+    from numba import njit
+    import numpy as np
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _url_features_kernel(buf):
+        dashes = 0
+        dots = 0
+        for i in range(buf.size):
+            b = buf[i]
+            if b == 0x2d:
+                dashes += 1
+            elif b == 0x2e:
+                dots += 1
+        return buf.size, dashes, dots
+
+    @njit(nogil=True, cache=True)
+    def _batch_url_features_kernel(buf, offsets):
+        n = offsets.size - 1
+        out = np.zeros((n, 3), dtype=np.int64)
+        for i in range(n):
+            dashes = 0
+            dots = 0
+            for j in range(offsets[i], offsets[i + 1]):
+                b = buf[j]
+                if b == 0x2d:
+                    dashes += 1
+                elif b == 0x2e:
+                    dots += 1
+            out[i, 0] = offsets[i + 1] - offsets[i]
+            out[i, 1] = dashes
+            out[i, 2] = dots
+        return out
+
+def url_features(buf: bytes) -> Tuple[int, int, int]:
+    """
+    Count structural URL features in a single pass
+
+    Args:
+        buf: UTF-8 encoded URL
+
+    Returns:
+        Tuple of (length, dash count, dot count)
+    """
+    if NUMBA_AVAILABLE:
+        return _url_features_kernel(np.frombuffer(buf, dtype=np.uint8))
+
+    return len(buf), buf.count(b'-'), buf.count(b'.')
+
+def batch_url_features(bufs: List[bytes]) -> List[Tuple[int, int, int]]:
+    """
+    Count structural URL features for many URLs in one call
+
+    With numba the URLs are packed into one buffer and scanned in one call
+    with the GIL released.
+
+    Args:
+        bufs: UTF-8 encoded URLs
+
+    Returns:
+        One (length, dash count, dot count) tuple per URL
+    """
+    if not NUMBA_AVAILABLE:
+        return [url_features(buf) for buf in bufs]
+
+    offsets = np.zeros(len(bufs) + 1, dtype=np.int64)
+    np.cumsum([len(buf) for buf in bufs], out=offsets[1:])
+    packed = np.frombuffer(b''.join(bufs), dtype=np.uint8)
+    return [tuple(row) for row in _batch_url_features_kernel(packed, offsets).tolist()]
+
+# Compile the kernels at import; fall back to bytes methods if they cannot be built
+if NUMBA_AVAILABLE:
+    NUMBA_AVAILABLE = warm_up_kernels(
+        "URL feature", "bytes methods", lambda: url_features(b''), lambda: batch_url_features([b''])
+    )
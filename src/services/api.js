@@ -77,7 +77,7 @@ export const getQuizQuestions = async (questionId) => {
 
 // Safety Report
 export const generateSafetyReport = async (analysisResults, userActions = {}) => {
-  const response = await fetch(`${API_BASE_URL}/education/safety-report`, {
+  const response = await fetch(`${API_BASE_URL}/education/safety-report?format=json`, {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json',
@@ -0,0 +1,28 @@
+import pytest
+
+from app import _is_clearly_benign_url, score_url
+from models.url_features import url_features
+
+
+@pytest.mark.parametrize('url', [
+    'https://google.com',
+    'https://www.github.com/',
+])
+def test_bare_trusted_host_is_fast_accepted(url):
+    assert _is_clearly_benign_url(url, url_features(url.encode('utf-8')))
+
+
+@pytest.mark.parametrize('url', [
+    'https://sites.google.com/view/paypal-login-verify',
+    'https://github.com/login-verify',
+    'https://docs.google.com/forms/d/urgent-verify',
+])
+def test_path_on_trusted_host_gets_full_analysis(url):
+    assert not _is_clearly_benign_url(url, url_features(url.encode('utf-8')))
+
+
+def test_phishing_path_on_trusted_host_is_scored():
+    url = 'https://github.com/login-verify'
+    result = score_url(url, url_features(url.encode('utf-8')))
+    assert 'bad_url_reputation' in result['indicators']
+    assert result['risk_score'] > 0
@@ -0,0 +1,16 @@
+"""WSGI entrypoint for production servers
+
+Run with a preforking server so the analyzers are built once before fork:
+
+    gunicorn -w $(nproc) --preload -k gthread --threads 4 -b 0.0.0.0:5000 wsgi:application
+"""
+from app import app, get_education_service, get_image_analyzer, get_text_analyzer
+
+# Build the shared analyzers now so --preload constructs them before forking.
+# The text classifier is left to load lazily in each worker: torch and ONNX
+# Runtime thread pools created here would not survive the fork
+get_text_analyzer()
+get_image_analyzer()
+get_education_service()
+
+application = app